@@ -60,9 +60,24 @@ def get_folder_size_kb(folder_path: Path) -> float:
         logging.warning(f"Folder not found: {folder_path}. Size will be reported as 0.")
         return 0.0
 
-    for entry in folder_path.rglob("*"):
-        if entry.is_file():
-            total_size_bytes += entry.stat().st_size
+    # Walk with os.scandir so directory entries carry their type and no Path
+    # object is built per file.
+    pending = [str(folder_path)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            # Unreadable, or removed mid-walk: skipped, as rglob did
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        total_size_bytes += entry.stat().st_size
+                except OSError:
+                    continue
 
     return total_size_bytes / 1024
 
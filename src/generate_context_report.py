@@ -26,12 +26,23 @@ def extract_text_from_content(content):
 def get_folder_size(path):
     """Calculates the total size of a folder in kilobytes."""
     total_size = 0
-    for dirpath, _, filenames in os.walk(path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            # skip if it is symbolic link
-            if not os.path.islink(fp):
-                total_size += os.path.getsize(fp)
+    pending = [str(path)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            # Unreadable, or removed mid-walk: skipped, as os.walk did
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    # skip if it is symbolic link
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
     return total_size / 1024
 
 
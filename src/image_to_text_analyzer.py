@@ -4,9 +4,8 @@
 # saves the resulting description to a text file.
 #
 # The script's main functionalities are:
-# 1.  **Dependency Management**: It includes a simple function to check for and
-#     install required Python packages (`openai`, `python-dotenv`, `tqdm`) if they
-#     are not already present in the environment.
+# 1.  **Dependencies**: The required Python packages (`openai`, `python-dotenv`,
+#     `tqdm`) are listed in `requirements.txt`.
 #
 # 2.  **Image Discovery**: It walks through a specified input directory and all of
 #     its subdirectories to find all image files. It identifies images based on
@@ -42,29 +41,9 @@
 
 import os
 import sys
-import subprocess
 import base64
 import mimetypes
 from dotenv import load_dotenv
-
-# --- Package Installation ---
-required_packages = ["openai", "python-dotenv", "tqdm"]
-
-
-def install_packages():
-    """Install required Python packages if they are not already installed."""
-    for package in required_packages:
-        try:
-            # A simple import check
-            __import__(package if package != "python-dotenv" else "dotenv")
-        except ImportError:
-            print(f"Installing {package}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-
-
-# Install dependencies before proceeding
-install_packages()
-
 from openai import OpenAI
 from tqdm import tqdm
 
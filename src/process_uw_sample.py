@@ -5,9 +5,9 @@
 # subfolder.
 #
 # The script's main functionalities are:
-# 1.  **Dependency Management**: It includes a function to check for and install
-#     necessary Python packages like pandas, openpyxl, and various OCR-related
-#     libraries (Tesseract, Pillow, etc.) if they are not already installed.
+# 1.  **Dependencies**: The required Python packages, such as pandas, openpyxl,
+#     and the OCR-related libraries (pytesseract, pypdfium2, Pillow), are listed
+#     in `requirements.txt`.
 #
 # 2.  **Multi-Format File Processing**: It is capable of handling several different
 #     file types, including:
@@ -45,38 +45,13 @@
 
 import os
 import sys
-import subprocess
 from pathlib import Path
 
-
-# --- Dependency Installation ---
-def install_dependencies():
-    """Install required packages."""
-    required = ["pandas", "openpyxl", "pytesseract", "pypdfium2", "pillow", "tqdm"]
-    for pkg in required:
-        try:
-            __import__(
-                pkg
-                if pkg not in ["pillow", "pytesseract", "pypdfium2"]
-                else {
-                    "pillow": "PIL",
-                    "pytesseract": "pytesseract",
-                    "pypdfium2": "pypdfium2",
-                }[pkg]
-            )
-        except ImportError:
-            print(f"Installing {pkg}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
-
-
-install_dependencies()
-
 import pandas as pd
 import pytesseract
 import pypdfium2 as pdfium
 from PIL import Image, ImageOps
 from tqdm import tqdm
-import re
 
 # Configure Tesseract path if necessary
 # On Windows, you might need to set this explicitly.
@@ -90,8 +65,7 @@ if sys.platform == "win32":
 # --- Text and PDF Processing Functions (from simple_ocr.py) ---
 def clean_text(text):
     """Removes extra whitespace and optionally other patterns."""
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    return " ".join(text.split())
 
 
 def preprocess_image_for_ocr(pil_image):
@@ -5,18 +5,20 @@
 # for each case.
 #
 # The script's main functionalities are:
-# 1.  **Dependency Management**: It includes a function to check for and install
-#     necessary Python packages, including `pytesseract` for the OCR interface,
-#     `pypdfium2` for PDF rendering, and `Pillow` for image manipulation.
+# 1.  **Dependencies**: The required Python packages, `pytesseract` for the OCR
+#     interface, `pypdfium2` for PDF rendering, and `Pillow`/`numpy` for image
+#     manipulation, are listed in `requirements.txt`. `tesserocr` is used instead
+#     of `pytesseract` when it is installed.
 #
 # 2.  **PDF-to-Image Conversion**: It uses `pypdfium2` to render each page of a
 #     PDF document into a high-resolution image. This is a crucial step as
-#     Tesseract operates on images, not directly on PDF files.
+#     Tesseract operates on images, not directly on PDF files. Born-digital pages,
+#     whose extractable text layer is not just a stamp over a scanned image, skip
+#     rendering and OCR entirely.
 #
-# 3.  **Image Preprocessing**: Before performing OCR, each rendered page (as a
-#     Pillow image object) is preprocessed to improve the accuracy of the text
-#     extraction. This includes converting the image to grayscale and then to a
-#     binary (black and white) format, which often yields better results with
+# 3.  **Image Preprocessing**: Before performing OCR, each page is rendered in
+#     grayscale and converted to a binary (black and white) image to improve the
+#     accuracy of the text extraction, which often yields better results with
 #     Tesseract.
 #
 # 4.  **OCR with Tesseract**: The preprocessed image of each page is then passed
@@ -30,6 +32,9 @@
 #
 # 6.  **Context File Generation**: The final aggregated text for each case folder
 #     is saved to a `-context-clean.txt` file in a specified output directory.
+#     The text of each PDF is also cached under `<output_dir>/.ocr_cache`, keyed
+#     by a hash of the file contents and of the OCR settings, so unchanged PDFs
+#     are not OCR'd again on the next run.
 #
 # 7.  **Command-Line Interface**: The script can be run with optional command-line
 #     arguments to specify the input directory (containing the case folders) and
@@ -42,32 +47,29 @@
 #   need to be adjusted depending on the installation location.
 
 import os
-import sys
-import subprocess
-
-# Ensure required packages are installed
-required_packages = [
-    "pytesseract",
-    "pypdfium2",
-    "pillow",  # Provides PIL
-]
-
-
-def install_packages():
-    for pkg in required_packages:
-        try:
-            __import__(pkg if pkg != "pillow" else "PIL")
-        except ImportError:
-            print(f"Installing {pkg}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
-
 
-install_packages()
+# Pages are OCR'd by one Tesseract per CPU already; keep each from also starting an
+# OpenMP thread per core. Set before tesserocr loads, and inherited by worker
+# processes and by the tesseract subprocesses pytesseract starts.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
+import sys
+import hashlib
+import numpy as np
 import pytesseract
 import pypdfium2 as pdfium
-from PIL import Image, ImageOps
-import re
+import pypdfium2.raw as pdfium_c
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+# Optional: tesserocr binds the Tesseract C++ API directly, so the language model is
+# loaded once per process instead of once per page by a new tesseract subprocess.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 # NOTE: Tesseract OCR must be installed on the system for this script to work.
 # On Windows, you can download and install it from: https://github.com/UB-Mannheim/tesseract/wiki
@@ -77,45 +79,318 @@ import re
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
 
-def preprocess_image_for_ocr(pil_image):
+# Gray level above which a pixel is treated as background when binarizing pages.
+BINARY_THRESHOLD = 180
+# Pages are rendered at this multiple of 72 dpi for OCR.
+RENDER_SCALE = 3
+
+
+def binarize_for_ocr(gray):
     """
-    Pre-processes a PIL image for better OCR results using Pillow.
+    Thresholds a 2D uint8 grayscale array into a black and white PIL image with a
+    single vectorized NumPy comparison (cleaner for Tesseract than Pillow's dithered
+    "1" mode).
     """
-    gray_image = ImageOps.grayscale(pil_image)
-    binary_image = gray_image.convert("1")
-    return binary_image
+    binary = (gray > BINARY_THRESHOLD).astype(np.uint8) * 255
+    return Image.fromarray(binary)
+
+
+# LSTM engine only (--oem 1) and a single uniform block of text (--psm 6): rendered
+# pages of these filings have a simple layout, so Tesseract's full automatic page
+# segmentation and legacy engine are wasted work.
+TESSERACT_CONFIG = "--oem 1 --psm 6 -c tessedit_do_invert=0"
+
+_tesseract_api = None
+
+
+def get_tesseract_api():
+    """
+    Returns this process's tesserocr API, creating it on first use.
+    """
+    global _tesseract_api
+    if _tesseract_api is None:
+        # Same settings as TESSERACT_CONFIG
+        _tesseract_api = tesserocr.PyTessBaseAPI(
+            psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.LSTM_ONLY
+        )
+        _tesseract_api.SetVariable("tessedit_do_invert", "0")
+    return _tesseract_api
+
+
+def image_to_text(image):
+    """
+    Runs Tesseract on a PIL image. Reuses one tesserocr API per process when the
+    package is installed, otherwise falls back to a pytesseract subprocess call.
+    """
+    if tesserocr is None:
+        return pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+    api = get_tesseract_api()
+    api.SetImage(image)
+    return api.GetUTF8Text()
+
+
+def init_ocr_worker():
+    """
+    Initializer for OCR worker processes: loads the Tesseract model once, up front,
+    instead of on the worker's first page.
+    """
+    if tesserocr is not None:
+        get_tesseract_api()
 
 
 def clean_text(text):
     """
     Cleans the extracted text by removing extra whitespace.
     """
-    return re.sub(r"\s+", " ", text).strip()
+    # str.split() with no separator collapses and strips whitespace runs in C.
+    return " ".join(text.split())
+
 
+# A page's embedded text layer is used instead of OCR only when it has at least
+# MIN_TEXT_LAYER_CHARS characters, a mostly alphanumeric makeup, and images cover
+# less than MAX_TEXT_LAYER_IMAGE_COVERAGE of the page. The coverage check matters
+# for scanned pages carrying a stamped text line (e.g. a court filing header): their
+# text layer passes the character checks but says nothing about the scanned body.
+MIN_TEXT_LAYER_CHARS = 50
+MIN_TEXT_LAYER_ALNUM_RATIO = 0.6
+MAX_TEXT_LAYER_IMAGE_COVERAGE = 0.5
 
-def process_pdf_ocr_only(file_path):
+
+def image_coverage(page):
     """
-    Processes a single PDF file using a pure OCR approach with pypdfium2 and Tesseract.
+    Returns the share of the page area covered by image objects (0 to 1).
     """
-    full_text = []
+    left, bottom, right, top = page.get_bbox()
+    page_area = (right - left) * (top - bottom)
+    if page_area <= 0:
+        return 0.0
+    covered = 0.0
+    for obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]):
+        obj_left, obj_bottom, obj_right, obj_top = obj.get_pos()
+        width = min(obj_right, right) - max(obj_left, left)
+        height = min(obj_top, top) - max(obj_bottom, bottom)
+        if width > 0 and height > 0:
+            covered += width * height
+    return min(covered / page_area, 1.0)
+
+
+def extract_text_layer(page):
+    """
+    Returns the cleaned embedded text of a PDF page, or None if the page needs OCR:
+    it has no usable text layer, or its content is mostly a scanned image.
+    """
+    textpage = page.get_textpage()
     try:
-        doc = pdfium.PdfDocument(file_path)
-        for i in range(len(doc)):
-            page = doc.get_page(i)
-            # Render with a high resolution for better OCR
-            bitmap = page.render(scale=3)
-            pil_image = bitmap.to_pil()
+        text = clean_text(textpage.get_text_bounded())
+    finally:
+        textpage.close()
+
+    if len(text) < MIN_TEXT_LAYER_CHARS:
+        return None
+    alnum_chars = sum(c.isalnum() for c in text)
+    if alnum_chars / len(text) < MIN_TEXT_LAYER_ALNUM_RATIO:
+        return None
+    if image_coverage(page) >= MAX_TEXT_LAYER_IMAGE_COVERAGE:
+        return None
+    return text
+
+
+def ocr_page(page):
+    """
+    Renders a single PDF page and runs Tesseract on it.
+    """
+    # Render with a high resolution for better OCR. pdfium renders straight to
+    # grayscale and its pixel buffer is thresholded directly as a NumPy view, so
+    # the only copy made is the binarized image itself.
+    bitmap = page.render(scale=RENDER_SCALE, grayscale=True)
+    gray = np.frombuffer(bitmap.buffer, dtype=np.uint8).reshape(
+        bitmap.height, bitmap.stride
+    )[:, : bitmap.width]
+
+    preprocessed_image = binarize_for_ocr(gray)
+    page_text = image_to_text(preprocessed_image)
+    return clean_text(page_text)
+
+
+# (path, PdfDocument) of the PDF a worker process is currently OCR'ing
+_worker_pdf = None
+
+
+def ocr_pdf_page(file_path, page_index):
+    """
+    Worker-process entry point: OCRs one page of a PDF. pdfium handles are not
+    picklable, so each worker opens the document itself and keeps it open for the
+    following pages of the same file.
+    """
+    global _worker_pdf
+    if _worker_pdf is None or _worker_pdf[0] != file_path:
+        if _worker_pdf is not None:
+            _worker_pdf[1].close()
+        _worker_pdf = (file_path, pdfium.PdfDocument(file_path))
+    return ocr_page(_worker_pdf[1][page_index])
+
 
-            preprocessed_image = preprocess_image_for_ocr(pil_image)
-            page_text = pytesseract.image_to_string(preprocessed_image)
+def create_ocr_pool(max_workers):
+    """
+    Starts a process pool for OCR'ing pages, or returns None when only one worker
+    is wanted and pages should be OCR'd in the calling process.
+    """
+    if max_workers is not None and max_workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=init_ocr_worker)
+
+
+def process_pdf_ocr_only(file_path, ocr_pool=None):
+    """
+    Processes a single PDF file with pypdfium2 and Tesseract. Pages that already carry
+    an extractable text layer are read directly; the remaining (scanned) pages are
+    rendered and OCR'd on `ocr_pool`, or in this process when no pool is given.
+    Errors are reported and yield an empty string, except BrokenProcessPool, which
+    is raised so the caller can replace the pool.
+    """
+    try:
+        doc = pdfium.PdfDocument(file_path)
+        try:
+            full_text = [extract_text_layer(doc[i]) for i in range(len(doc))]
+            ocr_indices = [i for i, text in enumerate(full_text) if text is None]
+            if ocr_pool is None:
+                ocr_texts = [ocr_page(doc[i]) for i in ocr_indices]
+        finally:
+            doc.close()
 
-            full_text.append(clean_text(page_text))
+        if ocr_pool is not None:
+            ocr_texts = list(
+                ocr_pool.map(ocr_pdf_page, repeat(str(file_path)), ocr_indices)
+            )
+        for i, text in zip(ocr_indices, ocr_texts):
+            full_text[i] = text
         return "\n".join(full_text)
+    except BrokenProcessPool:
+        raise
     except Exception as e:
         print(f"  - Failed to process {file_path} with OCR. Error: {e}")
         return ""
 
 
+def file_fingerprint(file_path):
+    """
+    Returns a blake2b hex digest of a file's contents, read in 1 MiB blocks.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Bump when a code change alters the extracted text, to invalidate cached results.
+OCR_CACHE_VERSION = 1
+
+
+def ocr_settings_fingerprint():
+    """
+    Returns a short hash of everything besides the PDF itself that determines the
+    extracted text, so cached results from other settings are not reused.
+    """
+    settings = (
+        OCR_CACHE_VERSION,
+        TESSERACT_CONFIG,
+        BINARY_THRESHOLD,
+        RENDER_SCALE,
+        MIN_TEXT_LAYER_CHARS,
+        MIN_TEXT_LAYER_ALNUM_RATIO,
+        MAX_TEXT_LAYER_IMAGE_COVERAGE,
+        tesserocr is not None,
+    )
+    return hashlib.blake2b(repr(settings).encode("utf-8"), digest_size=4).hexdigest()
+
+
+def process_pdf_cached(pdf_path, cache_dir, ocr_pool=None):
+    """
+    Returns the extracted text of a PDF, reusing the result of a previous run from
+    `cache_dir` when the file's contents and the OCR settings have not changed.
+    """
+    try:
+        cache_file = os.path.join(
+            cache_dir,
+            f"{os.path.basename(pdf_path)}.{file_fingerprint(pdf_path)}"
+            f".{ocr_settings_fingerprint()}.txt",
+        )
+        if os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as f:
+                return f.read()
+    except Exception as e:
+        # Unreadable PDF or cache entry: extract without the cache, which reports
+        # and skips a PDF that cannot be processed at all.
+        print(f"  - OCR cache unavailable for {pdf_path}. Error: {e}")
+        return process_pdf_ocr_only(pdf_path, ocr_pool=ocr_pool)
+
+    text = process_pdf_ocr_only(pdf_path, ocr_pool=ocr_pool)
+    # An empty result is what a failed extraction returns; don't cache it.
+    if text:
+        tmp_file = cache_file + ".tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"  - Could not write OCR cache for {pdf_path}. Error: {e}")
+    return text
+
+
+def process_case_folder(case_path, output_dir, page_workers=None):
+    """
+    OCRs every PDF in a case folder and writes the aggregated text to
+    `<case-name>-context-clean.txt` in the output directory.
+    """
+    case_name = os.path.basename(case_path).replace(" ", "-")
+    print(f"Processing case: {case_name}")
+
+    all_case_text = []
+    pdf_files = [f for f in os.listdir(case_path) if f.lower().endswith(".pdf")]
+    cache_dir = os.path.join(output_dir, ".ocr_cache", case_name)
+
+    # One OCR pool serves every PDF of the case, so worker processes and their
+    # Tesseract models are set up once rather than per file.
+    ocr_pool = create_ocr_pool(page_workers) if pdf_files else None
+    try:
+        for pdf_file in pdf_files:
+            pdf_path = os.path.join(case_path, pdf_file)
+            print(f"  - Processing file: {pdf_file}")
+            try:
+                text = process_pdf_cached(pdf_path, cache_dir, ocr_pool=ocr_pool)
+            except BrokenProcessPool:
+                # A worker died (e.g. crashed in Tesseract or was OOM-killed while
+                # rendering) and the pool is unusable; retry once on a fresh pool.
+                print(f"  - OCR worker died on {pdf_file}, retrying with a new pool.")
+                ocr_pool.shutdown()
+                ocr_pool = create_ocr_pool(page_workers)
+                try:
+                    text = process_pdf_cached(pdf_path, cache_dir, ocr_pool=ocr_pool)
+                except BrokenProcessPool:
+                    # Don't save a context with a silent hole for this PDF
+                    print(
+                        f"  => OCR workers died again on {pdf_file}; "
+                        f"no context saved for case {case_name}."
+                    )
+                    return
+            all_case_text.append(f"--- Content from: {pdf_file} ---\n{text}\n\n")
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.shutdown()
+
+    if all_case_text:
+        output_filename = f"{case_name}-context-clean.txt"
+        output_filepath = os.path.join(output_dir, output_filename)
+        # Write via a temp file so a crashed worker never leaves a partial context
+        tmp_filepath = output_filepath + ".tmp"
+        with open(tmp_filepath, "w", encoding="utf-8") as f:
+            f.write("".join(all_case_text))
+        os.replace(tmp_filepath, output_filepath)
+        print(f"  => Saved cleaned context to {output_filepath}")
+
+
 def main():
     """
     Main function to iterate through case folders, process PDFs, and save the text.
@@ -139,30 +414,26 @@ def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    all_case_folders = [
-        d for d in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir, d))
-    ]
-
-    for case_folder in all_case_folders:
-        case_path = os.path.join(input_dir, case_folder)
-        case_name = os.path.basename(case_path).replace(" ", "-")
-        print(f"Processing case: {case_name}")
+    with os.scandir(input_dir) as entries:
+        all_case_paths = [entry.path for entry in entries if entry.is_dir()]
+    if not all_case_paths:
+        return
 
-        all_case_text = []
-        pdf_files = [f for f in os.listdir(case_path) if f.lower().endswith(".pdf")]
-
-        for pdf_file in pdf_files:
-            pdf_path = os.path.join(case_path, pdf_file)
-            print(f"  - Processing file: {pdf_file}")
-            text = process_pdf_ocr_only(pdf_path)
-            all_case_text.append(f"--- Content from: {pdf_file} ---\n{text}\n\n")
+    # Cases run in parallel; split the cores between case workers and the
+    # per-page OCR pool each of them starts.
+    cpu_count = os.cpu_count() or 1
+    case_workers = min(len(all_case_paths), max(1, cpu_count // 2))
+    page_workers = max(1, cpu_count // case_workers)
 
-        if all_case_text:
-            output_filename = f"{case_name}-context-clean.txt"
-            output_filepath = os.path.join(output_dir, output_filename)
-            with open(output_filepath, "w", encoding="utf-8") as f:
-                f.write("".join(all_case_text))
-            print(f"  => Saved cleaned context to {output_filepath}")
+    with ProcessPoolExecutor(max_workers=case_workers) as executor:
+        list(
+            executor.map(
+                process_case_folder,
+                all_case_paths,
+                repeat(output_dir),
+                repeat(page_workers),
+            )
+        )
 
 
 if __name__ == "__main__":
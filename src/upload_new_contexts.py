@@ -17,20 +17,24 @@
 #     file content, the dataset ID, and some hardcoded metadata like
 #     `zurich_challenge_id` and `data_upload_id`.
 #
-# 4.  **Insert Logic**: For each context file, the script will perform an "insert"
-#     operation into the 'n8n_context_cache' table. If a record with the same
-#     `dataset_id` and `zurich_challenge_id` already exists, the database may
-#     return an error, which will be logged. This ensures that only new,
-#     non-duplicate entries are added.
+# 4.  **Insert Logic**: Context rows are collected and inserted into the
+#     'n8n_context_cache' table in batches, one request per batch rather than per
+#     file. If a record with the same `dataset_id` and `zurich_challenge_id`
+#     already exists it is left untouched (ON CONFLICT DO NOTHING), so only new,
+#     non-duplicate entries are added. Files that have not changed since their
+#     last successful upload (tracked in `.upload_state.json` in the scanned
+#     folder) are skipped unless `--force` is given.
 #
-# 5.  **Logging and Error Handling**: The script provides clear logging for each step
-#     of the process, including which file is being processed and the success or
-#     failure of each database operation. It also handles potential exceptions
-#     during file processing and database interaction.
+# 5.  **Logging and Error Handling**: The script logs errors for any failed file
+#     read or database operation and a summary of uploaded, skipped and failed
+#     files at the end. Per-file progress is logged in verbose mode. It also
+#     handles potential exceptions during file processing and database interaction.
 #
 # 6.  **Command-Line Interface**: It includes a simple command-line interface to
-#     specify the target folder containing the context files and an optional flag
-#     for verbose logging output.
+#     specify the target folder containing the context files, the required
+#     `--zurich-challenge-id` and `--data-upload-id`, a `--force` flag to
+#     re-upload files even if unchanged, and a `-v/--verbose` flag for verbose
+#     logging output.
 #
 # Usage:
 #   - To upload files from the default 'output' folder:
@@ -41,11 +45,18 @@
 import os
 import sys
 import json
+import hashlib
 import logging
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import httpx
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from postgrest.utils import SyncClient
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -59,25 +70,155 @@ load_dotenv(override=True)
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 
+# --- Upload Settings ---
+# Rows are sent in batches of up to BATCH_SIZE rows, or fewer once the batch holds
+# BATCH_MAX_BYTES of UTF-8 encoded context, so large context files stay within
+# request limits.
+BATCH_SIZE = 500
+BATCH_MAX_BYTES = 20 * 1024 * 1024
+ON_CONFLICT = "dataset_id,zurich_challenge_id"
+# Batches are upserted concurrently while the next one is being read; at most
+# 2 * UPLOAD_WORKERS batches are held in memory at a time.
+UPLOAD_WORKERS = 4
+# Per-folder record of what was last uploaded successfully, used to skip files that
+# have not changed since.
+UPLOAD_STATE_FILENAME = ".upload_state.json"
+CONTEXT_SUFFIX = "-context.json"
+
 
 def get_supabase_client():
     """Initializes and returns the Supabase client if credentials are available."""
     if SUPABASE_URL and SUPABASE_KEY:
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        configure_connection_pool(client)
         logging.info("Supabase client initialized.")
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
+        return client
     logging.warning("Supabase URL or Key not found. Cannot proceed.")
     return None
 
 
+def configure_connection_pool(client):
+    """
+    Replaces the PostgREST HTTP session with one sized for the upload workers that
+    keeps idle connections alive between batches, so each upsert reuses an open
+    TLS connection instead of handshaking again.
+    """
+    # Rebuild the session the way postgrest does, with the client's own timeout,
+    # TLS verification and proxy settings, and only the pool limits changed.
+    postgrest = client.postgrest
+    session = postgrest.session
+    postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=postgrest.timeout,
+        verify=postgrest.verify,
+        proxy=postgrest.proxy,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=UPLOAD_WORKERS,
+            max_connections=2 * UPLOAD_WORKERS,
+            keepalive_expiry=60,
+        ),
+    )
+    session.close()
+
+
 # --- Main Logic ---
 
 
+def load_upload_state(state_file: Path) -> dict:
+    """Loads the record of previously uploaded files, or an empty one."""
+    if not state_file.exists():
+        return {}
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"Could not read upload state {state_file}, ignoring it: {e}")
+        return {}
+
+
+def save_upload_state(state_file: Path, upload_state: dict):
+    """Writes the record of uploaded files, replacing the previous one atomically."""
+    tmp_file = state_file.with_name(state_file.name + ".tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(upload_state, f, indent=2)
+        os.replace(tmp_file, state_file)
+    except Exception as e:
+        logging.error(f"Failed to write upload state {state_file}: {e}")
+
+
+def iter_context_files(output_path: Path):
+    """Yields the '*-context.json' entries of a folder as the directory is read."""
+    # os.scandir yields DirEntry objects whose file type comes from the directory
+    # listing itself, so filtering needs no extra stat per entry.
+    with os.scandir(output_path) as entries:
+        for entry in entries:
+            if entry.name.endswith(CONTEXT_SUFFIX) and entry.is_file():
+                yield entry
+
+
+def upsert_batch(supabase_client, rows) -> list:
+    """
+    Inserts a batch of rows into 'n8n_context_cache', skipping rows whose
+    dataset_id/zurich_challenge_id already exists. Returns the rows that were stored.
+
+    The batch is sent as a single request. If the database rejects it, the batch is
+    split in half and each half retried, so one bad row only fails itself instead
+    of every other row in its batch.
+    """
+    context_keys = ", ".join(row["context_key"] for row in rows)
+    logging.debug(f"  -> Upserting batch of {len(rows)} records...")
+    try:
+        # ignore_duplicates: existing records are kept as they are, as with a plain
+        # insert, but one duplicate no longer fails the rest of the batch.
+        # returning=minimal: by default PostgREST echoes every upserted row back,
+        # which would download each (large) context_value again just to discard it.
+        (
+            supabase_client.table("n8n_context_cache")
+            .upsert(
+                rows,
+                on_conflict=ON_CONFLICT,
+                ignore_duplicates=True,
+                returning=ReturnMethod.minimal,
+            )
+            .execute()
+        )
+        logging.debug(f"  -> Successfully upserted: {context_keys}")
+        return rows
+
+    except APIError as e:
+        if len(rows) == 1:
+            logging.error(f"  -> Failed to upsert {context_keys}: {e.message}")
+            return []
+        logging.debug(
+            f"  -> Batch of {len(rows)} records rejected ({e.message}), splitting it."
+        )
+        middle = len(rows) // 2
+        return upsert_batch(supabase_client, rows[:middle]) + upsert_batch(
+            supabase_client, rows[middle:]
+        )
+
+    except Exception as e:
+        # Connection or timeout errors are not caused by the rows, so the batch is
+        # not split and retried row by row.
+        logging.error(f"An exception occurred while upserting {context_keys}: {e}")
+        return []
+
+
 def upload_context_files(
-    output_folder: str, zurich_challenge_id: str, data_upload_id: str
+    output_folder: str,
+    zurich_challenge_id: str,
+    data_upload_id: str,
+    force: bool = False,
 ):
     """
     Scans for '*-context.json' files, reads their content, and inserts them
-    into the 'n8n_context_cache' table in Supabase.
+    into the 'n8n_context_cache' table in Supabase in batches. Files unchanged
+    since their last successful upload with the same IDs are skipped unless
+    `force` is set.
     """
     supabase_client = get_supabase_client()
     if not supabase_client:
@@ -89,53 +230,113 @@ def upload_context_files(
         return
 
     logging.info(f"Scanning for context files in: {output_path}")
-    context_files = list(output_path.glob("*-context.json"))
 
-    if not context_files:
-        logging.warning("No '*-context.json' files found to upload.")
-        return
+    state_file = output_path / UPLOAD_STATE_FILENAME
+    # Always load the full state: it also holds entries for other challenge and
+    # upload IDs, which must survive the save below even when forcing.
+    upload_state = load_upload_state(state_file)
 
-    logging.info(f"Found {len(context_files)} context files to process.")
+    in_flight = threading.BoundedSemaphore(2 * UPLOAD_WORKERS)
+    # (future, state entries to record for the rows of that batch that are stored)
+    submitted = []
 
-    for context_file in context_files:
-        dataset_id = context_file.name.replace("-context.json", "")
-        context_key = context_file.name
-        logging.info(f"Processing {context_file.name}...")
+    def submit_batch(executor, rows, batch_state):
+        in_flight.acquire()
+        future = executor.submit(upsert_batch, supabase_client, rows)
+        future.add_done_callback(lambda _: in_flight.release())
+        submitted.append((future, batch_state))
 
-        try:
-            with open(context_file, "r", encoding="utf-8") as f:
-                context_value = f.read()
-
-            data_to_upsert = {
-                "context_key": context_key,
-                "dataset_id": dataset_id,
-                "context_value": context_value,
-                "zurich_challenge_id": zurich_challenge_id,
-                "data_upload_id": data_upload_id,
-            }
+    found_count = skipped_count = 0
+    # Files are read and batched while the directory is still being scanned, so
+    # the first upsert is in flight before a large folder has been fully listed.
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        batch = []
+        batch_state = {}
+        batch_bytes = 0
+        for context_file in iter_context_files(output_path):
+            found_count += 1
+            context_key = context_file.name
+            # The scan only yields names ending in CONTEXT_SUFFIX
+            dataset_id = context_key[: -len(CONTEXT_SUFFIX)]
+            logging.debug(f"Processing {context_file.name}...")
 
-            # --- Insert Logic ---
-            # The script will insert a new record. If a context with the same
-            # dataset_id and zurich_challenge_id already exists, the database
-            # will likely return an error, which will be logged.
-            logging.info(f"  -> Inserting record for dataset_id: {dataset_id}...")
-            insert_response = (
-                supabase_client.table("n8n_context_cache")
-                .insert(data_to_upsert)
-                .execute()
-            )
+            state_key = f"{zurich_challenge_id}/{data_upload_id}/{context_key}"
+            previous = None if force else upload_state.get(state_key)
+            try:
+                stat = context_file.stat()
+                # Cheap pre-check: same mtime and size as the last upload
+                if (
+                    previous
+                    and previous["mtime"] == stat.st_mtime
+                    and previous["size"] == stat.st_size
+                ):
+                    logging.debug(f"  -> Unchanged since last upload: {context_key}")
+                    skipped_count += 1
+                    continue
 
-            if hasattr(insert_response, "error") and insert_response.error:
+                with open(context_file, "r", encoding="utf-8") as f:
+                    context_value = f.read()
+            except Exception as e:
                 logging.error(
-                    f"  -> Failed to insert {context_key}: {insert_response.error.message}"
+                    f"An exception occurred during processing of {context_key}: {e}"
                 )
-            else:
-                logging.info(f"  -> Successfully inserted: {context_key}")
+                continue
+
+            context_bytes = context_value.encode("utf-8")
+            content_hash = hashlib.blake2b(context_bytes, digest_size=16).hexdigest()
+            file_state = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "hash": content_hash,
+            }
+            if previous and previous["hash"] == content_hash:
+                # Touched but not modified; remember the new mtime
+                upload_state[state_key] = file_state
+                logging.debug(f"  -> Unchanged since last upload: {context_key}")
+                skipped_count += 1
+                continue
 
-        except Exception as e:
-            logging.error(
-                f"An exception occurred during processing of {context_key}: {e}"
+            batch_state[state_key] = file_state
+            batch.append(
+                {
+                    "context_key": context_key,
+                    "dataset_id": dataset_id,
+                    "context_value": context_value,
+                    "zurich_challenge_id": zurich_challenge_id,
+                    "data_upload_id": data_upload_id,
+                }
             )
+            # Count encoded bytes, not characters: non-ASCII text is larger on the wire
+            batch_bytes += len(context_bytes)
+
+            if len(batch) >= BATCH_SIZE or batch_bytes >= BATCH_MAX_BYTES:
+                submit_batch(executor, batch, batch_state)
+                batch = []
+                batch_state = {}
+                batch_bytes = 0
+
+        if batch:
+            submit_batch(executor, batch, batch_state)
+
+    if not found_count:
+        logging.warning("No '*-context.json' files found to upload.")
+        return
+
+    uploaded_count = failed_count = 0
+    for future, batch_state in submitted:
+        stored_rows = future.result()
+        for row in stored_rows:
+            state_key = f"{zurich_challenge_id}/{data_upload_id}/{row['context_key']}"
+            upload_state[state_key] = batch_state[state_key]
+        uploaded_count += len(stored_rows)
+        failed_count += len(batch_state) - len(stored_rows)
+    save_upload_state(state_file, upload_state)
+
+    # Per-file progress is logged at DEBUG (-v); report the totals once.
+    logging.info(
+        f"Found {found_count} context files: upserted {uploaded_count}, "
+        f"skipped {skipped_count} unchanged, {failed_count} failed."
+    )
 
 
 # --- CLI Interface ---
@@ -161,6 +362,11 @@ if __name__ == "__main__":
         required=True,
         help="The data upload ID.",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-upload every file, even if unchanged since its last upload.",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -177,5 +383,5 @@ if __name__ == "__main__":
         logging.getLogger().setLevel(logging.INFO)
 
     upload_context_files(
-        args.output_folder, args.zurich_challenge_id, args.data_upload_id
+        args.output_folder, args.zurich_challenge_id, args.data_upload_id, args.force
     )
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib import style
+from matplotlib.figure import Figure
 import argparse
 import os
 from pathlib import Path
@@ -10,7 +12,9 @@ def plot_token_distribution(excel_path, output_path):
     Reads an Excel file and plots the distribution of 'estimated_tokens'.
     """
     try:
-        df = pd.read_excel(excel_path)
+        # Only the token column is parsed into the frame; a missing column is
+        # reported below rather than raised here.
+        df = pd.read_excel(excel_path, usecols=lambda col: col == "estimated_tokens")
     except FileNotFoundError:
         print(f"Error: The file '{excel_path}' was not found.")
         return
@@ -20,35 +24,45 @@ def plot_token_distribution(excel_path, output_path):
         return
 
     # Cap values at 50k for the last bucket
-    tokens = df["estimated_tokens"].copy()
-    tokens[tokens >= 50000] = 50000
+    tokens = np.minimum(df["estimated_tokens"].to_numpy(), 50000)
 
-    plt.style.use("ggplot")
-    plt.figure(figsize=(12, 7))
+    # A standalone Figure renders with Agg directly, without pyplot's GUI backend
+    # selection and global figure registry.
+    style.use("ggplot")
+    fig = Figure(figsize=(12, 7))
+    ax = fig.add_subplot()
 
     # Define custom bins
     max_val = 50000
     bins = list(range(0, max_val + 5000, 5000))
 
-    n, bins, patches = plt.hist(tokens, bins=bins, color="skyblue", edgecolor="black")
+    # Bin with NumPy and draw the counts as bars, one rectangle per bin
+    counts, bins = np.histogram(tokens, bins=bins)
+    ax.bar(
+        bins[:-1],
+        counts,
+        width=np.diff(bins),
+        align="edge",
+        color="skyblue",
+        edgecolor="black",
+    )
 
-    plt.title("Distribution of Estimated Tokens (50k+ grouped)")
-    plt.xlabel("Estimated Tokens")
-    plt.ylabel("Frequency")
+    ax.set_title("Distribution of Estimated Tokens (50k+ grouped)")
+    ax.set_xlabel("Estimated Tokens")
+    ax.set_ylabel("Frequency")
 
     # Customize x-axis labels
     tick_labels = [f"{int(b/1000)}k" for b in bins[:-1]] + ["50k+"]
-    plt.xticks(ticks=bins, labels=tick_labels, rotation=45)
+    ax.set_xticks(bins, labels=tick_labels, rotation=45)
 
-    plt.grid(True, axis="y")
-    plt.tight_layout()
+    ax.grid(True, axis="y")
+    fig.tight_layout()
 
     # Ensure output directory exists
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-    plt.savefig(output_path, bbox_inches="tight", dpi=300)
+    fig.savefig(output_path, bbox_inches="tight", dpi=300)
     print(f"Distribution plot saved to: {output_path}")
-    plt.close()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,9 @@
 import os
 import re
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from dotenv import load_dotenv
 import openai
 from pinecone.grpc import PineconeGRPC as Pinecone
@@ -32,6 +35,7 @@ DATA_DIR = "Data"
 CHUNK_SIZE = 512  # tokens
 CHUNK_OVERLAP = 50  # tokens
 BATCH_SIZE = 100  # vectors to upsert at a time
+EMBED_WORKERS = 8  # batches embedded and upserted concurrently
 
 # --- INITIALIZATION ---
 print("Initializing clients...")
@@ -63,12 +67,10 @@ def create_pinecone_index_if_not_exists():
 def get_text_chunks(text):
     """Splits text into chunks of a specified size with overlap."""
     tokens = tokenizer.encode(text)
-    chunks = []
-    for i in range(0, len(tokens), CHUNK_SIZE - CHUNK_OVERLAP):
-        chunk_tokens = tokens[i : i + CHUNK_SIZE]
-        chunk_text = tokenizer.decode(chunk_tokens)
-        chunks.append(chunk_text)
-    return chunks
+    return [
+        tokenizer.decode(tokens[i : i + CHUNK_SIZE])
+        for i in range(0, len(tokens), CHUNK_SIZE - CHUNK_OVERLAP)
+    ]
 
 
 def embed_texts(texts):
@@ -77,6 +79,44 @@ def embed_texts(texts):
     return [item.embedding for item in response.data]
 
 
+def iter_chunks(case_path, files_to_process, namespace):
+    """
+    Yields (chunk_id, metadata) for every chunk of the given files, reading and
+    chunking one file at a time. The chunk text is carried in metadata["text"].
+    """
+    for filename in tqdm(
+        files_to_process, desc=f"Reading files in {namespace}", leave=False
+    ):
+        file_path = os.path.join(case_path, filename)
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                content = f.read()
+
+            chunks = get_text_chunks(content)
+        except Exception as e:
+            print(f"Error processing file {file_path}: {e}")
+            continue
+
+        for i, chunk_text in enumerate(chunks):
+            metadata = {
+                "source": filename,
+                "text": chunk_text,
+                "chunk_number": i + 1,
+                "namespace": namespace,
+            }
+            yield str(uuid.uuid4()), metadata
+
+
+def process_batch(index, namespace, batch_chunks):
+    """Embeds a batch of chunks and upserts the vectors into the namespace."""
+    embeddings = embed_texts([metadata["text"] for _, metadata in batch_chunks])
+    vectors_to_upsert = [
+        (chunk_id, embedding, metadata)
+        for (chunk_id, metadata), embedding in zip(batch_chunks, embeddings)
+    ]
+    index.upsert(vectors=vectors_to_upsert, namespace=namespace)
+
+
 # --- MAIN SCRIPT ---
 
 
@@ -86,94 +126,85 @@ def main():
 
     index = create_pinecone_index_if_not_exists()
 
-    # Get subdirectories in the data directory
-    case_dirs = [
-        d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))
-    ]
+    # Get subdirectories in the data directory. os.scandir reports each entry's
+    # type from the directory listing, so no per-entry stat is needed.
+    with os.scandir(DATA_DIR) as entries:
+        case_dirs = [entry for entry in entries if entry.is_dir()]
 
     if not case_dirs:
         print(f"No case directories found in '{DATA_DIR}'. Exiting.")
         return
 
     for case_dir in tqdm(case_dirs, desc="Processing cases"):
-        namespace_match = re.match(r"(Case \d+)", case_dir)
+        namespace_match = re.match(r"(Case \d+)", case_dir.name)
         if not namespace_match:
-            print(f"Skipping directory, does not match 'Case X' pattern: {case_dir}")
+            print(
+                f"Skipping directory, does not match 'Case X' pattern: {case_dir.name}"
+            )
             continue
 
         namespace = namespace_match.group(1)
         print(f"\nProcessing namespace: '{namespace}'")
 
-        case_path = os.path.join(DATA_DIR, case_dir)
+        case_path = case_dir.path
 
         # Find all .txt files in the subdirectory
-        files_to_process = [f for f in os.listdir(case_path) if f.endswith(".txt")]
+        with os.scandir(case_path) as entries:
+            files_to_process = [
+                entry.name
+                for entry in entries
+                if entry.name.endswith(".txt") and entry.is_file()
+            ]
 
         if not files_to_process:
             print(f"No .txt files found in '{case_path}'.")
             continue
 
-        all_chunks_for_namespace = []
-        for filename in tqdm(
-            files_to_process, desc=f"Reading files in {namespace}", leave=False
-        ):
-            file_path = os.path.join(case_path, filename)
-            try:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-
-                chunks = get_text_chunks(content)
-
-                for i, chunk_text in enumerate(chunks):
-                    chunk_id = str(uuid.uuid4())
-                    metadata = {
-                        "source": filename,
-                        "text": chunk_text,
-                        "chunk_number": i + 1,
-                        "namespace": namespace,
-                    }
-                    all_chunks_for_namespace.append(
-                        {"id": chunk_id, "text": chunk_text, "metadata": metadata}
-                    )
-
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
-
-        if not all_chunks_for_namespace:
-            print(f"No text chunks generated for namespace '{namespace}'.")
-            continue
-
-        print(
-            f"Generated {len(all_chunks_for_namespace)} chunks for namespace '{namespace}'."
-        )
         print("Embedding and upserting chunks to Pinecone...")
 
-        # Embed and upsert in batches
-        for i in tqdm(
-            range(0, len(all_chunks_for_namespace), BATCH_SIZE),
-            desc=f"Upserting to {namespace}",
-            leave=False,
-        ):
-            batch_chunks = all_chunks_for_namespace[i : i + BATCH_SIZE]
-
-            texts_to_embed = [chunk["text"] for chunk in batch_chunks]
+        # Chunks are embedded and upserted in batches as the files are read, so
+        # only the batches in flight are held in memory. Both steps are
+        # network-bound, so several batches run at once on the shared index handle.
+        in_flight = threading.BoundedSemaphore(2 * EMBED_WORKERS)
+        futures = []
+        with tqdm(
+            desc=f"Upserting to {namespace}", unit="chunk", leave=False
+        ) as progress, ThreadPoolExecutor(max_workers=EMBED_WORKERS) as executor:
+
+            def on_batch_done(future, size):
+                in_flight.release()
+                if future.exception() is None:
+                    progress.update(size)
+
+            chunk_iter = iter_chunks(case_path, files_to_process, namespace)
+            while batch_chunks := list(islice(chunk_iter, BATCH_SIZE)):
+                in_flight.acquire()
+                future = executor.submit(process_batch, index, namespace, batch_chunks)
+                future.add_done_callback(
+                    lambda f, size=len(batch_chunks): on_batch_done(f, size)
+                )
+                futures.append((future, len(batch_chunks)))
 
+        upserted_count = failed_count = 0
+        for future, size in futures:
             try:
-                embeddings = embed_texts(texts_to_embed)
-
-                vectors_to_upsert = []
-                for j, chunk in enumerate(batch_chunks):
-                    vectors_to_upsert.append(
-                        (chunk["id"], embeddings[j], chunk["metadata"])
-                    )
-
-                index.upsert(vectors=vectors_to_upsert, namespace=namespace)
-
+                future.result()
+                upserted_count += size
             except Exception as e:
+                failed_count += size
                 print(
                     f"Error embedding or upserting batch for namespace {namespace}: {e}"
                 )
 
+        if not futures:
+            print(f"No text chunks generated for namespace '{namespace}'.")
+            continue
+
+        print(
+            f"Embedded {upserted_count} chunks for namespace '{namespace}'"
+            f" ({failed_count} failed)."
+        )
+
     print("\n✅ Done: All chunks have been embedded and upserted to Pinecone.")
 
 
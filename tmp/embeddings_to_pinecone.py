@@ -17,27 +17,22 @@ index = pc.Index("zurich-bond-clauses")
 
 
 # ✅ Step 3: Embed + upsert
-def embed_text(text):
-    response = openai.embeddings.create(input=[text], model="text-embedding-3-small")
-    return response.data[0].embedding
+# One embeddings request per batch of clauses instead of one per clause; the
+# same batch is then upserted in a single call.
+def embed_texts(texts):
+    response = openai.embeddings.create(input=texts, model="text-embedding-3-small")
+    return [item.embedding for item in response.data]
 
 
-batch_size = 20
-to_upsert = []
+batch_size = 100
 
-for chunk in tqdm(chunks):
-    vector = embed_text(chunk["text"])
-    to_upsert.append(
+for i in tqdm(range(0, len(chunks), batch_size)):
+    batch = chunks[i : i + batch_size]
+    vectors = embed_texts([chunk["text"] for chunk in batch])
+    to_upsert = [
         (chunk["id"], vector, {"source": chunk["source"], "text": chunk["text"]})
-    )
-
-    # Upload in batches
-    if len(to_upsert) >= batch_size:
-        index.upsert(vectors=to_upsert)
-        to_upsert = []
-
-# Final batch
-if to_upsert:
+        for chunk, vector in zip(batch, vectors)
+    ]
     index.upsert(vectors=to_upsert)
 
 print("✅ Done: All chunks embedded and upserted to Pinecone.")
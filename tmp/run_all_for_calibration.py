@@ -1,6 +1,39 @@
+import json
 import os
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+def evaluate_for_training(file_path, output_filename):
+    """
+    Runs the evaluation script in training mode on a single file.
+    Returns True if the evaluation succeeded.
+    """
+    print(f"  - Evaluating: {os.path.basename(file_path)}")
+    # The child's output goes to a temporary file rather than into memory and is
+    # only read back if the evaluation fails.
+    with tempfile.TemporaryFile() as log:
+        # We call evaluate_file.py as a separate process in training mode
+        result = subprocess.run(
+            [
+                sys.executable,
+                "src/evaluate_file.py",
+                file_path,
+                "--generate-training-data",
+                "--output-file",
+                output_filename,
+            ],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        if result.returncode != 0:
+            log.seek(0)
+            print(f"Failed to evaluate {file_path} for training.")
+            print(f"Output: {log.read().decode('utf-8', errors='replace')}")
+            return False
+    return True
 
 
 def run_calibration_on_directory(directory_path, output_filename):
@@ -14,33 +47,36 @@ def run_calibration_on_directory(directory_path, output_filename):
         os.remove(output_filename)
         print(f"Removed old '{output_filename}' to generate fresh data.")
 
-    for filename in os.listdir(directory_path):
-        if filename.endswith(".docx.txt"):
-            file_path = os.path.join(directory_path, filename)
-            print(f"  - Evaluating: {filename}")
-            try:
-                # We call evaluate_file.py as a separate process in training mode
-                result = subprocess.run(
-                    [
-                        sys.executable,
-                        "src/evaluate_file.py",
-                        file_path,
-                        "--generate-training-data",
-                        "--output-file",
-                        output_filename,
-                    ],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                )
-                if result.returncode != 0:
-                    print(f"Failed to evaluate {file_path} for training.")
-                    print(f"Stderr: {result.stderr}")
-                    print(f"Stdout: {result.stdout}")
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to evaluate {file_path} for training.")
-                print(f"Stderr: {e.stderr}")
-                print(f"Stdout: {e.stdout}")
+    with os.scandir(directory_path) as entries:
+        file_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.endswith(".docx.txt") and entry.is_file()
+        ]
+
+    # The evaluations are independent, so they run in parallel. Each one writes to
+    # its own scratch file, and the scratch files are merged in directory order.
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        scratch_files = [
+            os.path.join(scratch_dir, f"{i}.json") for i in range(len(file_paths))
+        ]
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            succeeded = list(
+                executor.map(evaluate_for_training, file_paths, scratch_files)
+            )
+
+        if not any(succeeded):
+            return
+
+        all_scores = []
+        for scratch_file, ok in zip(scratch_files, succeeded):
+            if ok:
+                with open(scratch_file, "r", encoding="utf-8") as f:
+                    all_scores.extend(json.load(f))
+
+    with open(output_filename, "w", encoding="utf-8") as f:
+        json.dump(all_scores, f, indent=2)
+    print(f"Training data for {sum(succeeded)} files saved to '{output_filename}'")
 
 
 if __name__ == "__main__":
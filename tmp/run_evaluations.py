@@ -1,6 +1,26 @@
 import os
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+def evaluate(file_path):
+    """Runs the evaluation script on a single file."""
+    print(f"Evaluating: {file_path}")
+    # The child's output goes to a temporary file rather than into memory and is
+    # only read back if the evaluation fails.
+    with tempfile.TemporaryFile() as log:
+        # We call evaluate_file.py as a separate process
+        result = subprocess.run(
+            [sys.executable, "src/evaluate_file.py", file_path],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        if result.returncode != 0:
+            log.seek(0)
+            print(f"Failed to evaluate {file_path}.")
+            print(f"Output: {log.read().decode('utf-8', errors='replace')}")
 
 
 def run_evaluations_on_directory(directory_path):
@@ -11,22 +31,17 @@ def run_evaluations_on_directory(directory_path):
     if not os.path.exists("output"):
         os.makedirs("output")
 
-    for filename in os.listdir(directory_path):
-        if filename.endswith(".docx.txt"):
-            file_path = os.path.join(directory_path, filename)
-            print(f"Evaluating: {file_path}")
-            try:
-                # We call evaluate_file.py as a separate process
-                subprocess.run(
-                    [sys.executable, "src/evaluate_file.py", file_path],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                )
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to evaluate {file_path}.")
-                print(f"Stderr: {e.stderr}")
-                print(f"Stdout: {e.stdout}")
+    with os.scandir(directory_path) as entries:
+        file_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.endswith(".docx.txt") and entry.is_file()
+        ]
+
+    # Each evaluation runs in its own process and writes its own report, so they
+    # can run in parallel.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(evaluate, file_paths))
 
 
 if __name__ == "__main__":